@@ -14,6 +14,7 @@ class BSTTree:
         self.root = None
         self.active_node = None
         self.anim_time = .5
+        self.anim_sleep_time = 0.0
 
     def search(self, value, animate: bool = False):
         return self._rec_search(self.root, value, animate)
@@ -161,7 +162,9 @@ class BSTTree:
 
     def animation_focus(self, node: Node):
         self.active_node = node
+        started = time.perf_counter()
         time.sleep(self.anim_time)
+        self.anim_sleep_time += time.perf_counter() - started
         # self.active_node = None
 
 
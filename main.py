@@ -1,8 +1,12 @@
+import argparse
+import os
 import random
 import threading
+import time
 import pygame
 
 from node import Node
+from profiler import FrameProfiler, Stage
 from bsttree import BSTTree
 from avltree import AVLTree
 
@@ -22,7 +26,9 @@ class InputMode:
 
 
 class App:
-    def __init__(self, resolution: tuple = (1300, 800), fps: int = 60):
+    def __init__(self, resolution: tuple = (1300, 800), fps: int = 60, tree_size: int = 6,
+                 headless: bool = False, max_frames: int = 0, trace_path: str = None,
+                 view_mode: str = ViewMode.BST):
         self.COLOR_NODE_SELECTED = pygame.color.Color(0, 255, 255)
         self.RESOLUTION = pygame.math.Vector2(resolution)
         self.FPS = fps
@@ -36,12 +42,12 @@ class App:
 
         self.depth_height_delta = 80
         self.node_radius = 20
-        self.tree_size = 6
+        self.tree_size = tree_size
         self.x_node_span = 0
 
         self.input = ""
         self.input_mode = InputMode.NONE
-        self.tree_view_mode = ViewMode.BST
+        self.tree_view_mode = view_mode
         self.view_scroll = pygame.math.Vector2(0, 30)
         self.node_count_per_depth_drawn = {}
         self.bst_node_count_per_depth = {}
@@ -51,6 +57,9 @@ class App:
         self.lmb_down = False
         self.execute_input = False
         self.recenter_view = False
+        self.headless = headless
+        self.max_frames = max_frames
+        self.profiler = FrameProfiler(trace_path, headless)
 
         self.timer = None
         self.screen = None
@@ -58,6 +67,7 @@ class App:
         self.help_font = None
         self.help_text = None
         self.input_font = None
+        self.overlay_font = None
         self.initialize_window()
 
         self.avl_tree = None
@@ -65,11 +75,19 @@ class App:
         self.initialize_trees()
 
         self.running = True
-        while self.running:
-            self.main_loop()
-        pygame.quit()
+        try:
+            while self.running:
+                self.main_loop()
+        finally:
+            self.profiler.close()
+            if self.headless or trace_path is not None:
+                print(self.profiler.summary())
+            pygame.quit()
 
     def initialize_window(self):
+        if self.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
         pygame.init()
         self.screen = pygame.display.set_mode(self.RESOLUTION)
         pygame.display.set_caption("Wizualizator drzewa BST i AVL")
@@ -79,9 +97,11 @@ class App:
         self.node_font = pygame.font.Font("Arvo-Bold.ttf", 16 * self.node_radius // 20)
         self.input_font = pygame.font.Font("Arvo-Bold.ttf", 36)
         self.help_font = pygame.font.Font("Arvo-Bold.ttf", 12)
+        self.overlay_font = pygame.font.Font("Arvo-Bold.ttf", 14)
         self.help_text = self.help_font.render("INSERT (I), DELETE (D), SEARCH (S), ZOOM IN (+), ZOOM OUT (-), "
                                                "ADD NODES (UP), REMOVE NODES (DOWN), SLOW DOWN (LEFT), "
-                                               "SPEED UP (RIGHT), MOVE (LMB)", True, pygame.color.Color(30, 40, 50))
+                                               "SPEED UP (RIGHT), MOVE (LMB), PROFILER (P)",
+                                               True, pygame.color.Color(30, 40, 50))
 
     def initialize_trees(self):
         self.recenter_view = True
@@ -104,14 +124,21 @@ class App:
             self.bst_tree.insert(Node(value))
 
     def main_loop(self):
+        self.profiler.begin_frame()
+        self.profiler.start(Stage.SLEEP)
         self.fps_sleeper()
+        self.profiler.stop()
+        self.profiler.start(Stage.EVENTS)
         self.event_handler()
+        self.profiler.stop()
         if self.execute_input:
             thread = threading.Thread(target=self.input_handler)
             thread.start()
             self.execute_input = False
         self.renderer()
         self.recenter_view = False
+        if self.max_frames and self.profiler.frame >= self.max_frames:
+            self.running = False
 
     def event_handler(self):
         for event in pygame.event.get():
@@ -183,6 +210,9 @@ class App:
                 elif event.key == pygame.K_RETURN:
                     self.execute_input = True
 
+                elif event.key == pygame.K_p:
+                    self.profiler.toggle_overlay()
+
                 elif event.key == pygame.K_UP:
                     self.tree_size += 3
                     self.initialize_trees()
@@ -208,19 +238,34 @@ class App:
                     self.input_mode = InputMode.NONE
 
     def renderer(self):
+        self.profiler.start(Stage.CLEAR)
         self.screen.fill(self.BG_COLOR)
+        self.profiler.stop()
+        self.profiler.start(Stage.HUD)
         self.render_help()
         self.render_input()
+        self.profiler.stop()
         self.render_tree()
+        if self.profiler.overlay_visible:
+            self.profiler.start(Stage.OVERLAY)
+            self.render_profiler_overlay()
+            self.profiler.stop()
+        self.profiler.start(Stage.DISPLAY_UPDATE)
         pygame.display.update()
+        self.profiler.stop()
 
     def fps_sleeper(self):
         self.timer.tick(self.FPS)
 
     def render_tree(self):
         self.node_count_per_depth_drawn = {}
+        self.profiler.start(Stage.COUNT_NODES)
         self.count_nodes_per_depth()
+        self.profiler.stop()
 
+        self.profiler.start(Stage.TREE_DRAW)
+        profiling = self.profiler.enabled
+        text_time = 0.0
         if self.tree_view_mode == ViewMode.BST:
             self.x_node_span = max(self.bst_node_count_per_depth.values()) * self.node_radius * 3
         elif self.tree_view_mode == ViewMode.AVL:
@@ -229,6 +274,7 @@ class App:
             self.x_node_span = self.RESOLUTION.x
 
         def calculate_point_recursive(node, parent_x, parent_y, min_x, max_x, y, parent_node):
+            nonlocal text_time
             if node is None:
                 return
 
@@ -247,6 +293,7 @@ class App:
 
             x += self.view_scroll.x
             self.node_count_per_depth_drawn[node.depth] += 1
+            self.profiler.nodes_drawn += 1
 
             if parent_node is not None:
                 if parent_node.right is node:
@@ -262,11 +309,17 @@ class App:
 
             pygame.draw.circle(self.screen, self.BG_COLOR, (x, y), self.node_radius)
             pygame.draw.circle(self.screen, color, (x, y), self.node_radius, 3)
+            if self.tree_view_mode == ViewMode.AVL:
+                balance_factor = self.avl_tree.calc_balance_factor(node)
+            if profiling:
+                text_started = time.perf_counter()
             text = self.node_font.render(str(node.value), True, color)
             self.screen.blit(text, (x - text.get_width() // 2, y - text.get_height() // 2))
             if self.tree_view_mode == ViewMode.AVL:
-                bal_text = self.help_font.render(str(self.avl_tree.calc_balance_factor(node)), True, color)
+                bal_text = self.help_font.render(str(balance_factor), True, color)
                 self.screen.blit(bal_text, (x - bal_text.get_width() // 2 + self.node_radius, y - text.get_height() // 2 - self.node_radius))
+            if profiling:
+                text_time += time.perf_counter() - text_started
 
         def get_node_color(mpos_dist, node):
             if ((self.tree_view_mode == ViewMode.BST and self.bst_tree.active_node is node) or
@@ -289,6 +342,8 @@ class App:
             calculate_point_recursive(self.bst_tree.root, None, None, 0, self.RESOLUTION.x, 100 + self.view_scroll.y, None)
         if self.tree_view_mode == ViewMode.AVL:
             calculate_point_recursive(self.avl_tree.root, None, None, 0, self.RESOLUTION.x, 100 + self.view_scroll.y, None)
+        self.profiler.add(Stage.TEXT, text_time)
+        self.profiler.stop()
 
     def count_nodes_per_depth(self):
         self.bst_node_count_per_depth.clear()
@@ -317,26 +372,61 @@ class App:
         avl_visible = self.tree_view_mode == ViewMode.AVL
         if not self.input.isnumeric():
             return
+        value = int(self.input)
         if self.input_mode == InputMode.INSERT:
-            self.bst_tree.insert(Node(int(self.input)), bst_visible)
-            self.avl_tree.insert(Node(int(self.input)), avl_visible)
+            self.timed_operation(self.bst_tree, "BST INSERT", lambda: self.bst_tree.insert(Node(value), bst_visible))
+            self.timed_operation(self.avl_tree, "AVL INSERT", lambda: self.avl_tree.insert(Node(value), avl_visible))
         if self.input_mode == InputMode.DELETE:
-            self.bst_tree.delete(self.bst_tree.search(int(self.input), bst_visible), bst_visible)
-            self.avl_tree.delete(Node(int(self.input)), avl_visible)
+            self.timed_operation(self.bst_tree, "BST DELETE",
+                                 lambda: self.bst_tree.delete(self.bst_tree.search(value, bst_visible), bst_visible))
+            self.timed_operation(self.avl_tree, "AVL DELETE", lambda: self.avl_tree.delete(Node(value), avl_visible))
         if self.input_mode == InputMode.SEARCH:
-            self.bst_tree.search(int(self.input), bst_visible)
-            self.avl_tree.search(int(self.input), avl_visible)
+            self.timed_operation(self.bst_tree, "BST SEARCH", lambda: self.bst_tree.search(value, bst_visible))
+            self.timed_operation(self.avl_tree, "AVL SEARCH", lambda: self.avl_tree.search(value, avl_visible))
         self.count_nodes_per_depth()
         self.input_mode = InputMode.INFO
         self.input = ""
 
+    def timed_operation(self, tree: BSTTree, name: str, operation):
+        # animation sleeps are excluded so only the tree algorithm itself is reported
+        slept = tree.anim_sleep_time
+        started = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - started - (tree.anim_sleep_time - slept)
+        self.profiler.record_operation(name, elapsed)
+
     def render_help(self):
         self.screen.blit(self.help_text, (10, self.RESOLUTION.y - 10 - self.help_text.get_height()))
 
+    def render_profiler_overlay(self):
+        lines = self.profiler.overlay_lines()
+        y = 20
+        for line in lines:
+            text = self.overlay_font.render(line, True, (200, 200, 200))
+            self.screen.blit(text, (self.RESOLUTION.x - 20 - text.get_width(), y))
+            y += text.get_height()
+
     def center_view_scroll(self):
         self.view_scroll.y = 30
         self.view_scroll.x = self.RESOLUTION.x / 2 - self.x_node_span / 2
 
 
 if __name__ == "__main__":
-    App()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap, 0 disables it")
+    parser.add_argument("--tree-size", type=int, default=6, help="initial number of nodes minus one")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the generated trees")
+    parser.add_argument("--view", choices=["bst", "avl"], default="bst", help="tree shown on start")
+    parser.add_argument("--headless", action="store_true", help="render with the SDL dummy video driver")
+    parser.add_argument("--frames", type=int, default=0, help="quit after this many frames, 0 runs until closed")
+    parser.add_argument("--trace", default=None, help="write per-frame timings to a .csv or .json file")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    frames = args.frames
+    if args.headless and frames == 0:
+        frames = 600
+    view_mode = ViewMode.AVL if args.view == "avl" else ViewMode.BST
+    App(fps=args.fps, tree_size=args.tree_size, headless=args.headless, max_frames=frames, trace_path=args.trace,
+        view_mode=view_mode)
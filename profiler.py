@@ -0,0 +1,175 @@
+import csv
+import json
+import threading
+import time
+
+
+class Stage:
+    SLEEP = "sleep"
+    EVENTS = "events"
+    CLEAR = "clear"
+    COUNT_NODES = "count_nodes"
+    TREE_DRAW = "tree_draw"
+    TEXT = "text"
+    HUD = "hud"
+    OVERLAY = "overlay"
+    DISPLAY_UPDATE = "display_update"
+    # whatever part of the frame is not covered by any of the timed stages above
+    OTHER = "other"
+
+    ALL = [SLEEP, EVENTS, CLEAR, COUNT_NODES, TREE_DRAW, TEXT, HUD, OVERLAY, DISPLAY_UPDATE, OTHER]
+
+
+class FrameProfiler:
+    def __init__(self, trace_path: str = None, always_enabled: bool = False):
+        self.trace_path = trace_path
+        self.always_enabled = always_enabled or trace_path is not None
+        self.overlay_visible = False
+        self.enabled = self.always_enabled
+        self.frame = 0
+        self.nodes_drawn = 0
+        self.last_record = None
+
+        self._stage_times = {}
+        self._stack = []
+        self._frame_start = None
+        self._frame_profiled = False
+        self._operations = []
+        self._operations_lock = threading.Lock()
+        self._totals = {stage: 0.0 for stage in Stage.ALL}
+        self._total_frame_time = 0.0
+        self._recorded_frames = 0
+
+        self._trace_file = None
+        self._csv_writer = None
+        self._json_first_record = True
+        if trace_path is not None:
+            self._open_trace()
+
+    def _open_trace(self):
+        self._trace_file = open(self.trace_path, "w", newline="")
+        if self.trace_path.endswith(".json"):
+            self._trace_file.write("[")
+        else:
+            self._csv_writer = csv.DictWriter(self._trace_file, fieldnames=self._fieldnames())
+            self._csv_writer.writeheader()
+
+    @staticmethod
+    def _fieldnames():
+        return (["frame", "time", "fps", "frame_ms"] + [stage + "_ms" for stage in Stage.ALL]
+                + ["nodes_drawn", "operation", "operation_ms"])
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.always_enabled
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_profiled:
+            self._finish_frame(now)
+        self._frame_profiled = self.enabled
+        self._frame_start = now
+        self._stage_times = {stage: 0.0 for stage in Stage.ALL}
+        self._stack = []
+        self.nodes_drawn = 0
+        self.frame += 1
+
+    def _finish_frame(self, now: float):
+        frame_time = now - self._frame_start
+        with self._operations_lock:
+            operations = self._operations
+            self._operations = []
+        self._stage_times[Stage.OTHER] = max(0.0, frame_time - sum(self._stage_times.values()))
+
+        record = {
+            "frame": self.frame,
+            "time": round(self._frame_start, 6),
+            "fps": round(1 / frame_time, 2) if frame_time > 0 else 0.0,
+            "frame_ms": round(frame_time * 1000, 3),
+        }
+        for stage in Stage.ALL:
+            record[stage + "_ms"] = round(self._stage_times[stage] * 1000, 3)
+            self._totals[stage] += self._stage_times[stage]
+        record["nodes_drawn"] = self.nodes_drawn
+        record["operation"] = ";".join(name for name, _ in operations)
+        record["operation_ms"] = ";".join(str(round(seconds * 1000, 3)) for _, seconds in operations)
+
+        self._total_frame_time += frame_time
+        self._recorded_frames += 1
+        self.last_record = record
+        self._write_record(record)
+
+    def _write_record(self, record: dict):
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(record)
+        elif self._trace_file is not None:
+            if not self._json_first_record:
+                self._trace_file.write(",")
+            self._trace_file.write("\n" + json.dumps(record))
+            self._json_first_record = False
+
+    def start(self, stage: str):
+        if not self.enabled:
+            return
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def stop(self):
+        if not self.enabled or not self._stack:
+            return
+        stage, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        # nested stages are reported on their own, so the parent only keeps its self time
+        self._stage_times[stage] = self._stage_times.get(stage, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def add(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        self._stage_times[stage] = self._stage_times.get(stage, 0.0) + seconds
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+    def record_operation(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._operations_lock:
+            self._operations.append((name, seconds))
+
+    def overlay_lines(self):
+        record = self.last_record
+        if record is None:
+            return ["PROFILER: WAITING FOR FRAME"]
+        lines = [
+            "FPS " + str(record["fps"]) + "  FRAME " + str(record["frame_ms"]) + " ms",
+            "NODES DRAWN " + str(record["nodes_drawn"]),
+        ]
+        for stage in Stage.ALL:
+            lines.append(stage.upper() + " " + str(record[stage + "_ms"]) + " ms")
+        if record["operation"]:
+            lines.append("OP " + record["operation"] + " " + record["operation_ms"] + " ms")
+        return lines
+
+    def summary(self):
+        if self._recorded_frames == 0:
+            return "no frames recorded"
+        frames = self._recorded_frames
+        lines = [
+            "frames: " + str(frames),
+            "avg fps: " + str(round(frames / self._total_frame_time, 2)),
+            "avg frame: " + str(round(self._total_frame_time / frames * 1000, 3)) + " ms",
+        ]
+        for stage in Stage.ALL:
+            lines.append("  " + stage + ": " + str(round(self._totals[stage] / frames * 1000, 3)) + " ms")
+        return "\n".join(lines)
+
+    def close(self):
+        if self._frame_profiled:
+            self._finish_frame(time.perf_counter())
+            self._frame_profiled = False
+        if self._trace_file is not None:
+            if self._csv_writer is None:
+                self._trace_file.write("\n]\n")
+            self._trace_file.close()
+            self._trace_file = None
+            self._csv_writer = None
@@ -0,0 +1,140 @@
+import csv
+import json
+
+import pytest
+
+import profiler as profiler_module
+from profiler import FrameProfiler, Stage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms: float):
+        self.now += ms / 1000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(profiler_module.time, "perf_counter", fake)
+    return fake
+
+
+def run_frame(profiler: FrameProfiler, clock: FakeClock):
+    profiler.begin_frame()
+    profiler.start(Stage.TREE_DRAW)
+    clock.advance(8)
+    profiler.start(Stage.TEXT)
+    clock.advance(2)
+    profiler.stop()
+    profiler.stop()
+
+
+def test_nested_stage_keeps_only_self_time(clock):
+    profiler = FrameProfiler(always_enabled=True)
+    run_frame(profiler, clock)
+    profiler.close()
+    record = profiler.last_record
+    assert record["text_ms"] == 2.0
+    assert record["tree_draw_ms"] == 8.0
+    assert record["frame_ms"] == 10.0
+
+
+def test_add_is_subtracted_from_parent(clock):
+    profiler = FrameProfiler(always_enabled=True)
+    profiler.begin_frame()
+    profiler.start(Stage.TREE_DRAW)
+    clock.advance(10)
+    profiler.add(Stage.TEXT, 0.004)
+    profiler.stop()
+    profiler.close()
+    record = profiler.last_record
+    assert record["text_ms"] == 4.0
+    assert record["tree_draw_ms"] == 6.0
+
+
+def test_other_covers_untimed_part_of_frame(clock):
+    profiler = FrameProfiler(always_enabled=True)
+    profiler.begin_frame()
+    profiler.start(Stage.CLEAR)
+    clock.advance(1)
+    profiler.stop()
+    clock.advance(3)
+    profiler.close()
+    record = profiler.last_record
+    assert record["clear_ms"] == 1.0
+    assert record["other_ms"] == 3.0
+    assert record["frame_ms"] == 4.0
+
+
+def test_disabled_profiler_records_nothing(clock):
+    profiler = FrameProfiler()
+    run_frame(profiler, clock)
+    profiler.record_operation("BST INSERT", 0.001)
+    profiler.close()
+    assert profiler.last_record is None
+    assert profiler.summary() == "no frames recorded"
+
+
+def test_toggle_mid_frame_starts_with_next_frame():
+    profiler = FrameProfiler()
+    profiler.begin_frame()
+    profiler.toggle_overlay()
+    profiler.start(Stage.HUD)
+    profiler.stop()
+    profiler.begin_frame()
+    assert profiler.last_record is None
+    profiler.close()
+    assert profiler.last_record["frame"] == 2
+
+
+def test_operation_is_attributed_to_the_frame_it_finished_in():
+    profiler = FrameProfiler(always_enabled=True)
+    profiler.begin_frame()
+    profiler.record_operation("BST INSERT", 0.0012)
+    profiler.record_operation("AVL INSERT", 0.002)
+    profiler.begin_frame()
+    assert profiler.last_record["operation"] == "BST INSERT;AVL INSERT"
+    assert profiler.last_record["operation_ms"] == "1.2;2.0"
+    profiler.close()
+    assert profiler.last_record["operation"] == ""
+
+
+def test_csv_trace(tmp_path, clock):
+    path = str(tmp_path / "trace.csv")
+    profiler = FrameProfiler(path)
+    run_frame(profiler, clock)
+    run_frame(profiler, clock)
+    profiler.close()
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["frame"] for row in rows] == ["1", "2"]
+    assert "other_ms" in rows[0]
+
+
+def test_json_trace(tmp_path, clock):
+    path = str(tmp_path / "trace.json")
+    profiler = FrameProfiler(path)
+    run_frame(profiler, clock)
+    run_frame(profiler, clock)
+    run_frame(profiler, clock)
+    profiler.close()
+    with open(path) as file:
+        records = json.load(file)
+    assert [record["frame"] for record in records] == [1, 2, 3]
+
+
+def test_summary(clock):
+    profiler = FrameProfiler(always_enabled=True)
+    run_frame(profiler, clock)
+    run_frame(profiler, clock)
+    profiler.close()
+    summary = profiler.summary()
+    assert summary.startswith("frames: 2")
+    assert "avg frame: 10.0 ms" in summary
+    assert "  tree_draw: 8.0 ms" in summary